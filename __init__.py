@@ -1,6 +1,6 @@
 """AI Agent Framework - Live Data Agents"""
 from .agent import AgentBrain, InventoryAgent, ToolDefinition, AgentResponse
-from .llm import BaseLLM, OpenAILLM, OllamaLLM, create_llm
+from .llm import BaseLLM, OpenAILLM, OllamaLLM, CachedLLM, create_llm
 from .state_engine import StateEngine, EntityState
 from .sandbox import ExecutionSandbox, SandboxResult
 from .connectors import BaseConnector, PostgresConnector, RestAPIConnector
@@ -8,7 +8,7 @@ from .connectors import BaseConnector, PostgresConnector, RestAPIConnector
 __version__ = "1.0.0"
 __all__ = [
     "AgentBrain", "InventoryAgent", "ToolDefinition", "AgentResponse",
-    "BaseLLM", "OpenAILLM", "OllamaLLM", "create_llm",
+    "BaseLLM", "OpenAILLM", "OllamaLLM", "CachedLLM", "create_llm",
     "StateEngine", "EntityState",
     "ExecutionSandbox", "SandboxResult",
     "BaseConnector", "PostgresConnector", "RestAPIConnector"
@@ -1,25 +1,60 @@
 """Agent Brain - Core agent logic with tool-calling architecture"""
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Callable
-from pydantic import BaseModel
-import json
+from typing_extensions import TypedDict
+from pydantic import TypeAdapter, ValidationError
+import asyncio
+import hashlib
+import re
+import orjson
 
-from .llm import BaseLLM
+from .llm import BaseLLM, tools_to_wire
 from .state_engine import StateEngine
 from .sandbox import ExecutionSandbox, SandboxResult
+from .connectors.base import utc_now_iso
 
 
-class ToolDefinition(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ToolDefinition:
     """Definition of an agent tool"""
     name: str
     description: str
     parameters: dict
     handler: Optional[Callable] = None
-    
-    class Config:
-        arbitrary_types_allowed = True
 
 
-class AgentResponse(BaseModel):
+# JSON-schema primitive types mapped to Python types for argument coercion
+_JSON_SCHEMA_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode values orjson doesn't handle natively, such as driver records and Decimals"""
+    if hasattr(obj, "keys"):
+        return dict(obj)
+    return str(obj)
+
+
+def _build_arguments_adapter(name: str, parameters: dict) -> TypeAdapter:
+    """Build a validator that coerces tool arguments to their declared types"""
+    fields = {}
+    for param, schema in parameters.get("properties", {}).items():
+        param_type = _JSON_SCHEMA_TYPES.get(schema.get("type"), Any)
+        if param_type is list:
+            item_type = _JSON_SCHEMA_TYPES.get(schema.get("items", {}).get("type"), Any)
+            param_type = List[item_type]
+        fields[param] = Optional[param_type]
+    return TypeAdapter(TypedDict(f"{name}_arguments", fields, total=False))
+
+
+@dataclass(slots=True, frozen=True)
+class AgentResponse:
     """Agent response with source tracking"""
     answer: str
     source: str  # "live_data", "tool_execution", "llm_only"
@@ -46,6 +81,11 @@ CRITICAL RULES:
 4. Include the timestamp of the data in your response
 
 Available tools will be provided. Use them for ANY question about dynamic/changing data."""
+    
+    # Tool results with more rows than this are serialized off the event loop
+    MAX_INLINE_ROWS = 20
+    # Rows beyond this are left out of the follow-up prompt
+    MAX_PROMPT_ROWS = 100
 
     def __init__(
         self,
@@ -57,62 +97,162 @@ Available tools will be provided. Use them for ANY question about dynamic/changi
         self.state = state_engine
         self.sandbox = sandbox
         self.tools: Dict[str, ToolDefinition] = {}
+        self._tools_schema_cache: List[dict] = []
+        self._tools_wire: List[dict] = []
+        self._dispatch: Dict[str, Callable] = {}
+        self._arguments: Dict[str, TypeAdapter] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
     
     def register_tool(self, tool: ToolDefinition) -> None:
         """Register a tool with the agent"""
+        if tool.handler is None:
+            raise ValueError(f"Tool {tool.name} has no handler")
+        
         self.tools[tool.name] = tool
-    
-    def _get_tools_schema(self) -> List[dict]:
-        """Get OpenAI-compatible tool schemas"""
-        return [
+        self._dispatch[tool.name] = tool.handler
+        self._arguments[tool.name] = _build_arguments_adapter(tool.name, tool.parameters)
+        # Rebuild so re-registering a name replaces its schema
+        self._tools_schema_cache = [
             {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.parameters
+                "name": t.name,
+                "description": t.description,
+                "parameters": t.parameters
             }
-            for tool in self.tools.values()
+            for t in self.tools.values()
         ]
+        self._tools_wire = tools_to_wire(self._tools_schema_cache)
+    
+    def _get_tools_schema(self) -> List[dict]:
+        """Get OpenAI-compatible tool schemas"""
+        return self._tools_schema_cache
     
     async def _execute_tool(self, tool_name: str, arguments: dict) -> SandboxResult:
         """Execute a tool and return results"""
-        tool = self.tools.get(tool_name)
-        if not tool:
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
             return SandboxResult(success=False, error=f"Unknown tool: {tool_name}")
         
-        if not tool.handler:
-            return SandboxResult(success=False, error=f"Tool {tool_name} has no handler")
-        
         try:
-            result = await tool.handler(**arguments)
-            return SandboxResult(success=True, result=result)
+            # Coerce to declared types and drop arguments the tool doesn't accept
+            arguments = self._arguments[tool_name].validate_python(arguments)
+            return SandboxResult(success=True, result=await handler(**arguments))
+        except ValidationError as e:
+            return SandboxResult(success=False, error=f"Invalid arguments for {tool_name}: {e}")
         except Exception as e:
             return SandboxResult(success=False, error=str(e))
     
+    def _prompt_payload(self, result: Any) -> tuple[Any, int]:
+        """Cap list fields at MAX_PROMPT_ROWS and report the largest row count"""
+        if not isinstance(result, dict):
+            return result, len(result) if isinstance(result, list) else 0
+        
+        payload = {}
+        rows = 0
+        for key, value in result.items():
+            if isinstance(value, list):
+                rows = max(rows, len(value))
+                if len(value) > self.MAX_PROMPT_ROWS:
+                    payload[f"{key}_omitted_rows"] = len(value) - self.MAX_PROMPT_ROWS
+                    value = value[:self.MAX_PROMPT_ROWS]
+            payload[key] = value
+        return payload, rows
+    
+    async def _serialize_tool_result(self, result: Any) -> str:
+        """Serialize a tool result for the follow-up prompt"""
+        payload, rows = self._prompt_payload(result)
+        if rows > self.MAX_INLINE_ROWS:
+            serialized = await asyncio.to_thread(orjson.dumps, payload, default=_json_default)
+        else:
+            serialized = orjson.dumps(payload, default=_json_default)
+        return serialized.decode()
+    
     async def process_query(self, user_query: str) -> AgentResponse:
         """
-        Process a user query:
-        1. Send to LLM with tools
-        2. If LLM requests a tool, execute it
-        3. Return response with live data
+        Process a user query.
+        Identical queries that arrive while one is already running share
+        its result instead of starting their own LLM and tool calls.
+        """
+        key = hashlib.blake2b(user_query.encode(), digest_size=16).hexdigest()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._do_process_query(user_query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller's cancellation doesn't cancel the shared work
+        return await asyncio.shield(task)
+    
+    def _route_query(self, user_query: str) -> Optional[dict]:
         """
-        tools_schema = self._get_tools_schema()
+        Map a query straight to a tool call without asking the LLM.
+        Returns None to let the LLM decide; subclasses override for known query shapes.
+        """
+        return None
+    
+    async def _request_tool_call(
+        self,
+        user_query: str
+    ) -> tuple[dict, Optional[dict], Optional[asyncio.Task]]:
+        """
+        Ask the LLM whether a tool is needed.
+        Returns the raw response, the parsed tool call, and a task already
+        running that tool if the provider reported the call while streaming.
+        """
+        tools_schema = self._tools_schema_cache
+        early_call: Optional[dict] = None
+        early_task: Optional[asyncio.Task] = None
         
-        # First LLM call - may request tool
-        response = await self.llm.generate(
-            prompt=user_query,
-            system_prompt=self.SYSTEM_PROMPT,
-            tools=tools_schema if tools_schema else None
-        )
+        def start_tool(call: dict) -> None:
+            # Run the tool while the model finishes streaming its response
+            nonlocal early_call, early_task
+            early_call = call
+            early_task = asyncio.create_task(self._execute_tool(call["name"], call["arguments"]))
+        
+        try:
+            response = await self.llm.generate(
+                prompt=user_query,
+                system_prompt=self.SYSTEM_PROMPT,
+                tools=tools_schema if tools_schema else None,
+                on_tool_call=start_tool,
+                tools_wire=self._tools_wire if tools_schema else None
+            )
+        except BaseException:
+            if early_task:
+                early_task.cancel()
+            raise
         
         # Check if LLM wants to call a tool
         tool_call = await self.llm.parse_tool_call(response)
         
+        if early_task and tool_call != early_call:
+            early_task.cancel()
+            early_task = None
+        
+        return response, tool_call, early_task
+    
+    async def _do_process_query(self, user_query: str) -> AgentResponse:
+        """
+        Process a user query:
+        1. Route known query shapes directly to a tool, else send to LLM with tools
+        2. If a tool is requested, execute it
+        3. Return response with live data
+        """
+        response = None
+        early_task = None
+        tool_call = self._route_query(user_query)
+        
+        # First LLM call - may request tool
+        if tool_call is None:
+            response, tool_call, early_task = await self._request_tool_call(user_query)
+        
         if tool_call:
-            # Execute the tool
-            tool_result = await self._execute_tool(
-                tool_call["name"],
-                tool_call["arguments"]
-            )
+            # Execute the tool, reusing the early run if it matches
+            if early_task:
+                tool_result = await early_task
+            else:
+                tool_result = await self._execute_tool(
+                    tool_call["name"],
+                    tool_call["arguments"]
+                )
             
             if not tool_result.success:
                 return AgentResponse(
@@ -127,11 +267,12 @@ Available tools will be provided. Use them for ANY question about dynamic/changi
                 timestamp = tool_result.result.get("timestamp")
             
             # Second LLM call - with tool results
+            serialized = await self._serialize_tool_result(tool_result.result)
             follow_up_prompt = f"""Original question: {user_query}
 
 Tool called: {tool_call["name"]}
 Tool result (LIVE DATA as of {timestamp or 'now'}):
-{json.dumps(tool_result.result, indent=2, default=str)}
+{serialized}
 
 Based on this LIVE data, answer the user's question. Always mention that this is live/current data."""
             
@@ -178,35 +319,73 @@ class InventoryAgent(AgentBrain):
     Example implementation showing how to create domain-specific agents.
     """
     
+    # Only the columns the LLM uses; keeps rows small on the wire and in prompts
+    INVENTORY_COLUMNS = "product_id, product_name, quantity, price, last_updated"
+    
+    # Query shapes routed to a tool without the planning LLM call
+    # IDs must contain a digit, so "product id of/for ..." and "product IDs" fall through to the LLM
+    _PRODUCT_ID_RE = re.compile(r"\bproduct\s+id(?!s\b)\s*(?:[:#]\s*)?([A-Z]*\d[\w-]*)\b", re.IGNORECASE)
+    _LOW_STOCK_RE = re.compile(r"\blow[\s-]+(?:on\s+)?stock\b", re.IGNORECASE)
+    # "running low" / "reorder" only count when the query is about stock or inventory.
+    # Two separate searches instead of one ".*" pattern keep routing linear in query length.
+    _LOW_TRIGGER_RE = re.compile(r"\b(?:running\s+low|reorder(?:ed|ing)?)\b", re.IGNORECASE)
+    _STOCK_WORD_RE = re.compile(r"\b(?:stock|inventory)\b", re.IGNORECASE)
+    _THRESHOLD_RE = re.compile(r"\b(?:below|under|less\s+than|fewer\s+than)\s+(\d+)\b|\b(\d+)\s+units?\b", re.IGNORECASE)
+    
     def __init__(self, llm: BaseLLM, state_engine: StateEngine, sandbox: ExecutionSandbox):
         super().__init__(llm, state_engine, sandbox)
         self._setup_inventory_tools()
     
+    def _route_query(self, user_query: str) -> Optional[dict]:
+        """Send unambiguous low-stock and product-ID questions straight to their tool"""
+        match = self._PRODUCT_ID_RE.search(user_query)
+        if match:
+            return {"name": "get_product_inventory", "arguments": {"product_id": match.group(1)}}
+        
+        if self._LOW_STOCK_RE.search(user_query) or (
+            self._LOW_TRIGGER_RE.search(user_query) and self._STOCK_WORD_RE.search(user_query)
+        ):
+            match = self._THRESHOLD_RE.search(user_query)
+            arguments = {"threshold": int(match.group(1) or match.group(2))} if match else {}
+            return {"name": "get_low_stock_items", "arguments": arguments}
+        
+        return None
+    
     def _setup_inventory_tools(self) -> None:
         """Register inventory-specific tools"""
+        columns = self.INVENTORY_COLUMNS
         
-        async def get_product_inventory(product_id: str = None, product_name: str = None) -> dict:
+        async def get_product_inventory(
+            product_id: str = None,
+            product_name: str = None,
+            product_ids: List[str] = None
+        ) -> dict:
             """Fetch live inventory data"""
             connector = self.state.get_connector("postgres")
             if not connector:
                 raise ValueError("PostgreSQL connector not configured")
             
-            if product_id:
-                query = "SELECT * FROM inventory WHERE product_id = $1"
+            if product_ids:
+                # One round-trip for several products
+                query = f"SELECT {columns} FROM inventory WHERE product_id = ANY($1::text[])"
+                params = {"product_ids": list(product_ids)}
+            elif product_id:
+                query = f"SELECT {columns} FROM inventory WHERE product_id = $1"
                 params = {"product_id": product_id}
             elif product_name:
-                query = "SELECT * FROM inventory WHERE LOWER(product_name) LIKE LOWER($1)"
+                query = f"SELECT {columns} FROM inventory WHERE LOWER(product_name) LIKE LOWER($1)"
                 params = {"product_name": f"%{product_name}%"}
             else:
-                query = "SELECT * FROM inventory ORDER BY product_name LIMIT 100"
+                query = f"SELECT {columns} FROM inventory ORDER BY product_name LIMIT 100"
                 params = None
             
+            timestamp = utc_now_iso()
             result = await self.sandbox.execute_sql(connector, query, params)
             
             if result.success:
                 return {
                     "inventory": result.result,
-                    "timestamp": result.execution_time_ms,
+                    "timestamp": timestamp,
                     "count": len(result.result) if result.result else 0
                 }
             raise ValueError(result.error)
@@ -217,13 +396,14 @@ class InventoryAgent(AgentBrain):
             if not connector:
                 raise ValueError("PostgreSQL connector not configured")
             
-            query = "SELECT * FROM inventory WHERE quantity <= $1 ORDER BY quantity ASC"
+            query = f"SELECT {columns} FROM inventory WHERE quantity <= $1 ORDER BY quantity ASC"
+            timestamp = utc_now_iso()
             result = await self.sandbox.execute_sql(connector, query, {"threshold": threshold})
             
             if result.success:
                 return {
                     "low_stock_items": result.result,
-                    "timestamp": result.execution_time_ms,
+                    "timestamp": timestamp,
                     "count": len(result.result) if result.result else 0
                 }
             raise ValueError(result.error)
@@ -239,6 +419,11 @@ class InventoryAgent(AgentBrain):
                         "type": "string",
                         "description": "Specific product ID to look up"
                     },
+                    "product_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several product IDs to look up in one call"
+                    },
                     "product_name": {
                         "type": "string", 
                         "description": "Product name to search for (partial match)"
@@ -1,10 +1,22 @@
 """Base Connector Interface"""
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Any, Optional
-from pydantic import BaseModel
+import httpx
 
 
-class QueryResult(BaseModel):
+# Connection pool limits shared by every persistent HTTP client
+DEFAULT_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=200)
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as an ISO-8601 string with millisecond precision"""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+@dataclass(slots=True, frozen=True)
+class QueryResult:
     """Standard query result format"""
     success: bool
     data: Any = None
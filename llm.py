@@ -1,22 +1,105 @@
 """LLM Interface Layer - Supports multiple LLM providers"""
 from abc import ABC, abstractmethod
-from typing import Any, Optional
-import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import hashlib
+import socket
+import time
 import httpx
+import orjson
+
+from .connectors.base import DEFAULT_LIMITS
+
+
+def _build_transport() -> httpx.AsyncHTTPTransport:
+    """HTTP/2 transport with Nagle's algorithm disabled for small request bodies"""
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=DEFAULT_LIMITS,
+        socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+    )
+
+
+async def _resolve_host(url: str) -> None:
+    """Resolve a URL's host ahead of the first request"""
+    parsed = httpx.URL(url)
+    try:
+        await asyncio.get_running_loop().getaddrinfo(parsed.host, parsed.port or 443)
+    except OSError:
+        pass
+
+
+def _json_object_complete(text: str) -> bool:
+    """Check whether text holds a complete top-level JSON object"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return True
+    return False
+
+
+def tools_to_wire(tools: list) -> list:
+    """Wrap tool schemas in the function-calling format used by OpenAI and Ollama"""
+    return [{"type": "function", "function": t} for t in tools]
+
+
+def _normalize_tool_call(tc: dict) -> dict:
+    """Return a tool call with arguments decoded to a dict exactly once"""
+    arguments = tc["function"]["arguments"]
+    return {
+        "name": tc["function"]["name"],
+        "arguments": arguments if isinstance(arguments, dict) else orjson.loads(arguments or "{}")
+    }
 
 
 class BaseLLM(ABC):
     """Abstract base class for LLM providers"""
     
     @abstractmethod
-    async def generate(self, prompt: str, system_prompt: str = "", tools: list = None) -> dict:
-        """Generate response from LLM"""
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        tools: list = None,
+        on_tool_call: Optional[Callable[[dict], None]] = None,
+        tools_wire: Optional[list] = None
+    ) -> dict:
+        """
+        Generate response from LLM.
+        Providers that stream may invoke on_tool_call with the first parsed
+        tool call before the response has finished. tools_wire, when given,
+        is the prebuilt provider form of tools and is sent as-is.
+        """
         pass
     
     @abstractmethod
     async def parse_tool_call(self, response: dict) -> Optional[dict]:
         """Parse tool call from LLM response"""
         pass
+    
+    async def warmup(self) -> None:
+        """Prepare connections ahead of the first request"""
+        pass
+    
+    async def aclose(self) -> None:
+        """Release any resources held by the provider"""
+        pass
 
 
 class OpenAILLM(BaseLLM):
@@ -25,9 +108,22 @@ class OpenAILLM(BaseLLM):
     def __init__(self, api_key: str, model: str = "gpt-4o"):
         self.api_key = api_key
         self.model = model
-        self.base_url = "https://api.openai.com/v1/chat/completions"
+        self.base_url = "https://api.openai.com"
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=_build_transport(),
+            timeout=60.0,
+            headers={"Authorization": f"Bearer {api_key}"}
+        )
     
-    async def generate(self, prompt: str, system_prompt: str = "", tools: list = None) -> dict:
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        tools: list = None,
+        on_tool_call: Optional[Callable[[dict], None]] = None,
+        tools_wire: Optional[list] = None
+    ) -> dict:
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -39,17 +135,72 @@ class OpenAILLM(BaseLLM):
         }
         
         if tools:
-            payload["tools"] = [{"type": "function", "function": t} for t in tools]
+            payload["tools"] = tools_wire or tools_to_wire(tools)
             payload["tool_choice"] = "auto"
+            if on_tool_call:
+                return await self._generate_stream(payload, on_tool_call)
+        
+        response = await self._client.post("/v1/chat/completions", json=payload)
+        return orjson.loads(response.content)
+    
+    async def _generate_stream(self, payload: dict, on_tool_call: Callable[[dict], None]) -> dict:
+        """
+        Stream a completion, reporting the first tool call as soon as its
+        arguments are complete. Returns the same shape as a non-streamed response.
+        """
+        payload["stream"] = True
+        content = []
+        tool_calls: Dict[int, dict] = {}
+        finish_reason = None
+        notified = False
+        
+        async with self._client.stream("POST", "/v1/chat/completions", json=payload) as response:
+            if response.status_code >= 400:
+                return orjson.loads(await response.aread())
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[6:]
+                if data == "[DONE]":
+                    break
+                
+                # Usage and content-filter chunks can carry an empty choices list
+                choices = orjson.loads(data).get("choices")
+                if not choices:
+                    continue
+                choice = choices[0]
+                delta = choice.get("delta") or {}
+                finish_reason = choice.get("finish_reason") or finish_reason
+                
+                if delta.get("content"):
+                    content.append(delta["content"])
+                
+                for tc_delta in delta.get("tool_calls") or []:
+                    tc = tool_calls.setdefault(tc_delta.get("index", 0), {
+                        "id": None,
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""}
+                    })
+                    if tc_delta.get("id"):
+                        tc["id"] = tc_delta["id"]
+                    function = tc_delta.get("function", {})
+                    tc["function"]["name"] += function.get("name") or ""
+                    tc["function"]["arguments"] += function.get("arguments") or ""
+                
+                first = tool_calls.get(0)
+                if not notified and first and _json_object_complete(first["function"]["arguments"]):
+                    notified = True
+                    try:
+                        call = _normalize_tool_call(first)
+                    except orjson.JSONDecodeError:
+                        continue
+                    on_tool_call(call)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.base_url,
-                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
-                json=payload,
-                timeout=60.0
-            )
-            return response.json()
+        message = {"role": "assistant", "content": "".join(content) or None}
+        if tool_calls:
+            message["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+        return {"choices": [{"index": 0, "message": message, "finish_reason": finish_reason}]}
     
     async def parse_tool_call(self, response: dict) -> Optional[dict]:
         try:
@@ -58,24 +209,46 @@ class OpenAILLM(BaseLLM):
             tool_calls = message.get("tool_calls", [])
             
             if tool_calls:
-                tc = tool_calls[0]
-                return {
-                    "name": tc["function"]["name"],
-                    "arguments": json.loads(tc["function"]["arguments"])
-                }
+                return _normalize_tool_call(tool_calls[0])
             return None
-        except (KeyError, json.JSONDecodeError):
+        except (KeyError, orjson.JSONDecodeError):
             return None
+    
+    async def warmup(self) -> None:
+        await _resolve_host(self.base_url)
+    
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
 
 class OllamaLLM(BaseLLM):
     """Ollama (local models) implementation"""
     
-    def __init__(self, model: str = "llama3.2", base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        model: str = "llama3.2",
+        base_url: str = "http://localhost:11434",
+        keep_alive: str = "30m"
+    ):
         self.model = model
         self.base_url = base_url
+        # Keeping the model loaded lets Ollama reuse the KV cache for the
+        # shared system prompt prefix instead of re-running prefill
+        self.keep_alive = keep_alive
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=_build_transport(),
+            timeout=120.0
+        )
     
-    async def generate(self, prompt: str, system_prompt: str = "", tools: list = None) -> dict:
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        tools: list = None,
+        on_tool_call: Optional[Callable[[dict], None]] = None,
+        tools_wire: Optional[list] = None
+    ) -> dict:
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -84,19 +257,15 @@ class OllamaLLM(BaseLLM):
         payload = {
             "model": self.model,
             "messages": messages,
-            "stream": False
+            "stream": False,
+            "keep_alive": self.keep_alive
         }
         
         if tools:
-            payload["tools"] = [{"type": "function", "function": t} for t in tools]
+            payload["tools"] = tools_wire or tools_to_wire(tools)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                timeout=120.0
-            )
-            return response.json()
+        response = await self._client.post("/api/chat", json=payload)
+        return orjson.loads(response.content)
     
     async def parse_tool_call(self, response: dict) -> Optional[dict]:
         try:
@@ -104,14 +273,104 @@ class OllamaLLM(BaseLLM):
             tool_calls = message.get("tool_calls", [])
             
             if tool_calls:
-                tc = tool_calls[0]
-                return {
-                    "name": tc["function"]["name"],
-                    "arguments": tc["function"]["arguments"]
-                }
+                return _normalize_tool_call(tool_calls[0])
+            return None
+        except (KeyError, orjson.JSONDecodeError):
+            return None
+    
+    async def warmup(self) -> None:
+        await _resolve_host(self.base_url)
+    
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class CachedLLM(BaseLLM):
+    """
+    Memoizes responses of another LLM for identical requests.
+    Entries expire after a short TTL so answers never outlive the live data
+    they were built from; concurrent identical requests share one call.
+    """
+    
+    def __init__(self, llm: BaseLLM, maxsize: int = 1024, ttl: float = 30.0):
+        self.llm = llm
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self._locks: Dict[bytes, asyncio.Lock] = {}
+    
+    @staticmethod
+    def _make_key(prompt: str, system_prompt: str, tools: Optional[list]) -> bytes:
+        tools_bytes = orjson.dumps(tools, option=orjson.OPT_SORT_KEYS) if tools else b""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(system_prompt.encode())
+        digest.update(b"\x00")
+        digest.update(prompt.encode())
+        digest.update(b"\x00")
+        digest.update(tools_bytes)
+        return digest.digest()
+    
+    def _get(self, key: bytes) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is None:
             return None
-        except KeyError:
+        expires_at, response = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
             return None
+        self._cache.move_to_end(key)
+        return response
+    
+    def _put(self, key: bytes, response: dict) -> None:
+        self._cache[key] = (time.monotonic() + self.ttl, response)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+    
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        tools: list = None,
+        on_tool_call: Optional[Callable[[dict], None]] = None,
+        tools_wire: Optional[list] = None
+    ) -> dict:
+        key = self._make_key(prompt, system_prompt, tools)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Another waiter may have filled the entry while we queued
+                cached = self._get(key)
+                if cached is not None:
+                    return cached
+                
+                response = await self.llm.generate(
+                    prompt,
+                    system_prompt,
+                    tools,
+                    on_tool_call=on_tool_call,
+                    tools_wire=tools_wire
+                )
+                # Never cache provider errors
+                if "error" not in response:
+                    self._put(key, response)
+                return response
+        finally:
+            if not lock.locked() and self._locks.get(key) is lock:
+                del self._locks[key]
+    
+    async def parse_tool_call(self, response: dict) -> Optional[dict]:
+        return await self.llm.parse_tool_call(response)
+    
+    async def warmup(self) -> None:
+        await self.llm.warmup()
+    
+    async def aclose(self) -> None:
+        await self.llm.aclose()
 
 
 def create_llm(provider: str, **kwargs) -> BaseLLM:
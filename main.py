@@ -7,7 +7,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from .llm import create_llm
+from .llm import create_llm, CachedLLM
 from .connectors import PostgresConnector
 from .state_engine import StateEngine
 from .sandbox import ExecutionSandbox
@@ -43,13 +43,16 @@ async def lifespan(app: FastAPI):
     # Initialize state engine
     state_engine = StateEngine(stale_threshold_seconds=0)  # Always fetch live
     
-    # Setup PostgreSQL connector
+    # Setup PostgreSQL connector; pool max is derived per worker unless set
+    pool_max = os.getenv("POSTGRES_POOL_MAX")
     pg_connector = PostgresConnector(
         host=os.getenv("POSTGRES_HOST", "localhost"),
         port=int(os.getenv("POSTGRES_PORT", "5432")),
         database=os.getenv("POSTGRES_DB", "inventory_db"),
         user=os.getenv("POSTGRES_USER", "postgres"),
-        password=os.getenv("POSTGRES_PASSWORD", "postgres")
+        password=os.getenv("POSTGRES_PASSWORD", "postgres"),
+        min_size=int(os.getenv("POSTGRES_POOL_MIN", "1")),
+        max_size=int(pool_max) if pool_max else None
     )
     
     # Try to connect (non-blocking if DB not available)
@@ -72,10 +75,17 @@ async def lifespan(app: FastAPI):
     elif llm_provider == "ollama":
         llm_config = {
             "model": os.getenv("OLLAMA_MODEL", "llama3.2"),
-            "base_url": os.getenv("OLLAMA_URL", "http://localhost:11434")
+            "base_url": os.getenv("OLLAMA_URL", "http://localhost:11434"),
+            "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m")
         }
     
     llm = create_llm(llm_provider, **llm_config)
+    await llm.warmup()
+    
+    # Memoize identical LLM requests for a short window (0 disables)
+    llm_cache_ttl = float(os.getenv("LLM_CACHE_TTL", "30"))
+    if llm_cache_ttl > 0:
+        llm = CachedLLM(llm, ttl=llm_cache_ttl)
     
     # Initialize sandbox
     sandbox = ExecutionSandbox(read_only=True, timeout_seconds=30.0)
@@ -87,6 +97,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # Cleanup
+    await llm.aclose()
     if pg_connector.pool:
         await pg_connector.disconnect()
     print("Shutdown complete")
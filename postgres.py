@@ -1,19 +1,48 @@
 """PostgreSQL Live Data Connector"""
-from datetime import datetime
-from typing import Any, Optional
+from typing import Any, List, Optional
+import os
 import asyncpg
-from .base import BaseConnector, QueryResult
+from .base import BaseConnector, QueryResult, utc_now_iso
+
+
+def _records_to_rows(records: List[asyncpg.Record]) -> List[dict]:
+    """Convert records to dicts, reading the column names only once"""
+    if not records:
+        return []
+    columns = list(records[0].keys())
+    return [dict(zip(columns, record)) for record in records]
+
+
+# Connections shared by all workers when no per-worker pool size is given;
+# stays below PostgreSQL's default max_connections=100
+DEFAULT_TOTAL_CONNECTIONS = 80
 
 
 class PostgresConnector(BaseConnector):
     """PostgreSQL database connector for live data queries"""
     
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        database: str,
+        user: str,
+        password: str,
+        min_size: int = 1,
+        max_size: Optional[int] = None,
+        command_timeout: float = 10.0
+    ):
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
+        self.min_size = min_size
+        # Pool sizes are per worker process; split the default budget across
+        # the uvicorn workers (WEB_CONCURRENCY) so the total stays bounded
+        workers = int(os.getenv("WEB_CONCURRENCY") or 1)
+        self.max_size = max_size if max_size is not None else max(2, DEFAULT_TOTAL_CONNECTIONS // workers)
+        self.command_timeout = command_timeout
         self.pool: Optional[asyncpg.Pool] = None
     
     async def connect(self) -> bool:
@@ -24,8 +53,13 @@ class PostgresConnector(BaseConnector):
                 database=self.database,
                 user=self.user,
                 password=self.password,
-                min_size=1,
-                max_size=10
+                min_size=min(self.min_size, self.max_size),
+                max_size=self.max_size,
+                command_timeout=self.command_timeout,
+                max_inactive_connection_lifetime=60,
+                statement_cache_size=1024,
+                # JIT compilation costs more than it saves on short OLTP lookups
+                server_settings={"jit": "off"}
             )
             return True
         except Exception as e:
@@ -38,11 +72,12 @@ class PostgresConnector(BaseConnector):
             self.pool = None
     
     async def query(self, query: str, params: dict = None) -> QueryResult:
+        ts = utc_now_iso()
         if not self.pool:
             return QueryResult(
                 success=False,
                 error="Not connected to database",
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=ts,
                 source="postgres"
             )
         
@@ -54,27 +89,27 @@ class PostgresConnector(BaseConnector):
                 else:
                     rows = await conn.fetch(query)
                 
-                data = [dict(row) for row in rows]
+                data = _records_to_rows(rows)
                 
                 if not await self.validate(data):
                     return QueryResult(
                         success=False,
                         error="Data validation failed",
-                        timestamp=datetime.utcnow().isoformat(),
+                        timestamp=ts,
                         source="postgres"
                     )
                 
                 return QueryResult(
                     success=True,
                     data=data,
-                    timestamp=datetime.utcnow().isoformat(),
+                    timestamp=ts,
                     source="postgres"
                 )
         except Exception as e:
             return QueryResult(
                 success=False,
                 error=str(e),
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=ts,
                 source="postgres"
             )
     
@@ -1,17 +1,23 @@
 """REST API Live Data Connector"""
-from datetime import datetime
 from typing import Any, Optional
 import httpx
-from .base import BaseConnector, QueryResult
+from .base import BaseConnector, QueryResult, DEFAULT_LIMITS, utc_now_iso
 
 
 class RestAPIConnector(BaseConnector):
     """REST API connector for live data queries"""
     
-    def __init__(self, base_url: str, headers: dict = None, timeout: float = 30.0):
+    def __init__(
+        self,
+        base_url: str,
+        headers: dict = None,
+        timeout: float = 30.0,
+        limits: Optional[httpx.Limits] = None
+    ):
         self.base_url = base_url.rstrip("/")
         self.headers = headers or {}
         self.timeout = timeout
+        self.limits = limits or DEFAULT_LIMITS
         self.client: Optional[httpx.AsyncClient] = None
     
     async def connect(self) -> bool:
@@ -19,7 +25,9 @@ class RestAPIConnector(BaseConnector):
             self.client = httpx.AsyncClient(
                 base_url=self.base_url,
                 headers=self.headers,
-                timeout=self.timeout
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=True
             )
             return True
         except Exception as e:
@@ -33,11 +41,12 @@ class RestAPIConnector(BaseConnector):
     
     async def query(self, query: str, params: dict = None) -> QueryResult:
         """Query is the endpoint path, params are query parameters"""
+        ts = utc_now_iso()
         if not self.client:
             return QueryResult(
                 success=False,
                 error="Not connected to API",
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=ts,
                 source="rest_api"
             )
         
@@ -50,28 +59,28 @@ class RestAPIConnector(BaseConnector):
                 return QueryResult(
                     success=False,
                     error="Data validation failed",
-                    timestamp=datetime.utcnow().isoformat(),
+                    timestamp=ts,
                     source="rest_api"
                 )
             
             return QueryResult(
                 success=True,
                 data=data,
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=ts,
                 source="rest_api"
             )
         except httpx.HTTPStatusError as e:
             return QueryResult(
                 success=False,
                 error=f"HTTP {e.response.status_code}: {e.response.text}",
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=ts,
                 source="rest_api"
             )
         except Exception as e:
             return QueryResult(
                 success=False,
                 error=str(e),
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=ts,
                 source="rest_api"
             )
     
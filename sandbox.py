@@ -1,16 +1,78 @@
 """Execution Sandbox - Safe environment for running queries and code"""
+from dataclasses import dataclass
+from time import perf_counter_ns
 from typing import Any, Dict, Optional
-from pydantic import BaseModel
 import asyncio
 import ast
+import builtins
+import functools
+import re
 
 
-class SandboxResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class SandboxResult:
     """Result of sandbox execution"""
     success: bool
     result: Any = None
     error: Optional[str] = None
-    execution_time_ms: float = 0
+    execution_time_ms: float = 0.0
+
+
+def _build_trie(words: set) -> dict:
+    """Build a character trie; the empty-string key marks the end of a word"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word.upper():
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return trie
+
+
+def _trie_to_regex(node: dict) -> str:
+    """Emit a regex whose alternations follow the trie, so shared prefixes are matched once"""
+    branches = [re.escape(ch) + _trie_to_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    is_word_end = "" in node
+    if len(branches) == 1 and not is_word_end:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if is_word_end else pattern
+
+
+@functools.lru_cache(maxsize=1024)
+def _validate_expression(expression: str, safe_builtins: frozenset) -> tuple[bool, Optional[str]]:
+    """Validate Python expression for safety (memoized per expression)"""
+    if not expression or not expression.strip():
+        return False, "Empty expression"
+    
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        return False, f"Syntax error: {e}"
+    except RecursionError:
+        return False, "Expression too deeply nested"
+    
+    # Check for dangerous node types, stopping at the first offender.
+    # ast.walk is iterative, so deeply nested expressions cannot overflow the stack.
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            return False, "Import statements not allowed"
+        if isinstance(node, ast.Call):
+            # Allow calls to safe builtins only
+            if not isinstance(node.func, ast.Name):
+                return False, "Complex function calls not allowed"
+            if node.func.id not in safe_builtins:
+                return False, f"Function '{node.func.id}' not allowed"
+    
+    return True, None
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_expression(expression: str):
+    """Compile a validated expression to a reusable code object"""
+    return compile(expression, "<sandbox>", "eval")
 
 
 class ExecutionSandbox:
@@ -25,6 +87,22 @@ class ExecutionSandbox:
         "UPDATE", "GRANT", "REVOKE", "EXEC", "EXECUTE"
     }
     
+    # Compiled once: a single scan per query instead of one per keyword/pattern.
+    # The keyword alternation is laid out as a trie so e.g. DROP/DELETE share one 'D' branch.
+    _KEYWORD_TRIE = _build_trie(DANGEROUS_SQL_KEYWORDS)
+    _SQL_KEYWORD_RE = re.compile(
+        r"(?:^|\W)(" + _trie_to_regex(_KEYWORD_TRIE) + r")(?:\W|$)",
+        re.IGNORECASE
+    )
+    _SQL_PATTERN_RE = re.compile(r"--|/\*|\*/|@@|N?CHAR\(", re.IGNORECASE)
+    # Row-locking clauses take locks and need UPDATE privilege, so they are not read-only
+    _SQL_ROW_LOCK_RE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+    # A single statement starting with SELECT (no ';') cannot carry a data-modifying command
+    _SELECT_ONLY_RE = re.compile(r"\s*SELECT\s[^;]*", re.IGNORECASE)
+    
+    # Expressions longer than this are validated in a worker thread
+    OFFLOAD_EXPRESSION_LENGTH = 512
+    
     # Allowed Python builtins for expression evaluation
     SAFE_BUILTINS = {
         "len", "str", "int", "float", "bool", "list", "dict", "tuple",
@@ -34,58 +112,43 @@ class ExecutionSandbox:
     def __init__(self, read_only: bool = True, timeout_seconds: float = 30.0):
         self.read_only = read_only
         self.timeout = timeout_seconds
+        self._safe_builtin_names = frozenset(self.SAFE_BUILTINS)
+        # Restricted globals, built once and shared by every evaluation
+        self._safe_globals = {
+            "__builtins__": {k: getattr(builtins, k) for k in self.SAFE_BUILTINS & set(dir(builtins))}
+        }
     
     def validate_sql(self, query: str) -> tuple[bool, Optional[str]]:
         """Validate SQL query for safety"""
         if not query or not query.strip():
             return False, "Empty query"
         
-        upper_query = query.upper()
-        
         if self.read_only:
-            for keyword in self.DANGEROUS_SQL_KEYWORDS:
+            if not self._SELECT_ONLY_RE.fullmatch(query):
                 # Check for keyword at word boundaries
-                if f" {keyword} " in f" {upper_query} " or upper_query.startswith(f"{keyword} "):
-                    return False, f"Dangerous keyword '{keyword}' not allowed in read-only mode"
+                match = self._SQL_KEYWORD_RE.search(query)
+                if match:
+                    return False, f"Dangerous keyword '{match.group(1).upper()}' not allowed in read-only mode"
+            
+            match = self._SQL_ROW_LOCK_RE.search(query)
+            if match:
+                clause = " ".join(match.group(0).upper().split())
+                return False, f"Locking clause '{clause}' not allowed in read-only mode"
         
         # Check for SQL injection patterns
-        dangerous_patterns = ["--", ";--", "/*", "*/", "@@", "CHAR(", "NCHAR("]
-        for pattern in dangerous_patterns:
-            if pattern in upper_query:
-                return False, f"Suspicious pattern '{pattern}' detected"
+        match = self._SQL_PATTERN_RE.search(query)
+        if match:
+            return False, f"Suspicious pattern '{match.group(0).upper()}' detected"
         
         return True, None
     
     def validate_python_expression(self, expression: str) -> tuple[bool, Optional[str]]:
         """Validate Python expression for safety"""
-        if not expression or not expression.strip():
-            return False, "Empty expression"
-        
-        try:
-            tree = ast.parse(expression, mode='eval')
-        except SyntaxError as e:
-            return False, f"Syntax error: {e}"
-        
-        # Check for dangerous node types
-        dangerous_types = (ast.Import, ast.ImportFrom, ast.Call)
-        for node in ast.walk(tree):
-            if isinstance(node, dangerous_types):
-                if isinstance(node, ast.Call):
-                    # Allow calls to safe builtins only
-                    if isinstance(node.func, ast.Name):
-                        if node.func.id not in self.SAFE_BUILTINS:
-                            return False, f"Function '{node.func.id}' not allowed"
-                    else:
-                        return False, "Complex function calls not allowed"
-                else:
-                    return False, "Import statements not allowed"
-        
-        return True, None
+        return _validate_expression(expression, self._safe_builtin_names)
     
     async def execute_sql(self, connector: Any, query: str, params: dict = None) -> SandboxResult:
         """Execute SQL query in sandbox"""
-        import time
-        start = time.time()
+        start = perf_counter_ns()
         
         # Validate query
         is_valid, error = self.validate_sql(query)
@@ -99,7 +162,7 @@ class ExecutionSandbox:
                 timeout=self.timeout
             )
             
-            elapsed = (time.time() - start) * 1000
+            elapsed = (perf_counter_ns() - start) / 1e6
             
             if result.success:
                 return SandboxResult(
@@ -123,21 +186,22 @@ class ExecutionSandbox:
     
     async def execute_expression(self, expression: str, context: dict = None) -> SandboxResult:
         """Safely evaluate a Python expression"""
-        import time
-        start = time.time()
+        start = perf_counter_ns()
         
-        # Validate expression
-        is_valid, error = self.validate_python_expression(expression)
+        # Validate expression; parsing long ones would stall the event loop
+        if len(expression) > self.OFFLOAD_EXPRESSION_LENGTH:
+            is_valid, error = await asyncio.to_thread(self.validate_python_expression, expression)
+        else:
+            is_valid, error = self.validate_python_expression(expression)
         if not is_valid:
             return SandboxResult(success=False, error=error)
         
         try:
-            # Create restricted globals
-            safe_globals = {"__builtins__": {k: getattr(__builtins__, k) for k in self.SAFE_BUILTINS if hasattr(__builtins__, k)}}
             safe_locals = context or {}
             
-            result = eval(expression, safe_globals, safe_locals)
-            elapsed = (time.time() - start) * 1000
+            code = _compile_expression(expression)
+            result = eval(code, self._safe_globals, safe_locals)
+            elapsed = (perf_counter_ns() - start) / 1e6
             
             return SandboxResult(
                 success=True,
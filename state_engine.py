@@ -1,17 +1,22 @@
 """State Engine - Tracks dynamic entity states in real-time"""
-from datetime import datetime
-from typing import Any, Dict, Optional
-from pydantic import BaseModel
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 import asyncio
+import time
 
 
-class EntityState(BaseModel):
+@dataclass(slots=True)
+class EntityState:
     """Represents the state of a dynamic entity"""
     entity_type: str
     entity_id: str
-    last_updated: str
+    last_updated: float  # time.monotonic() at last access
     is_stale: bool = False
-    connector_name: str
+    connector_name: str = ""
+    # Engine-wide and per-type invalidation generations seen at last access
+    generation: int = 0
+    type_generation: int = 0
 
 
 class StateEngine:
@@ -21,15 +26,31 @@ class StateEngine:
     to determine when to refresh and which connector to use.
     """
     
-    def __init__(self, stale_threshold_seconds: float = 0):
-        self._entity_registry: Dict[str, EntityState] = {}
+    def __init__(self, stale_threshold_seconds: float = 0, health_cache_seconds: float = 2.0):
+        self._entity_registry: Dict[Tuple[str, str], EntityState] = {}
+        # Bulk invalidation bumps a counter instead of touching every entity
+        self._generation = 0
+        self._type_generation: Dict[str, int] = {}
         self._connectors: Dict[str, Any] = {}
         self.stale_threshold = stale_threshold_seconds
-        self._lock = asyncio.Lock()
+        self.health_cache_ttl = health_cache_seconds
+        self._health_cache: Optional[tuple[float, Dict[str, bool]]] = None
+    
+    @property
+    def stale_threshold(self) -> float:
+        return self._stale_threshold
+    
+    @stale_threshold.setter
+    def stale_threshold(self, seconds: float) -> None:
+        self._stale_threshold = seconds
+        # Precomputed so hot paths can skip is_entity_stale entirely:
+        # `if engine.always_stale or engine.is_entity_stale(...)`
+        self.always_stale = seconds == 0
     
     def register_connector(self, name: str, connector: Any) -> None:
         """Register a data connector"""
         self._connectors[name] = connector
+        self._health_cache = None
     
     def get_connector(self, name: str) -> Optional[Any]:
         """Get a registered connector"""
@@ -37,58 +58,76 @@ class StateEngine:
     
     async def mark_entity_accessed(self, entity_type: str, entity_id: str, connector_name: str) -> None:
         """Mark an entity as recently accessed (for tracking purposes only)"""
-        key = f"{entity_type}:{entity_id}"
-        async with self._lock:
-            self._entity_registry[key] = EntityState(
-                entity_type=entity_type,
-                entity_id=entity_id,
-                last_updated=datetime.utcnow().isoformat(),
-                is_stale=False,
-                connector_name=connector_name
-            )
+        # No await between read and write, so no lock is needed on a single event loop
+        key = (entity_type, entity_id)
+        self._entity_registry[key] = EntityState(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            last_updated=time.monotonic(),
+            is_stale=False,
+            connector_name=connector_name,
+            generation=self._generation,
+            type_generation=self._type_generation.get(entity_type, 0)
+        )
     
     async def invalidate_entity(self, entity_type: str, entity_id: str) -> None:
         """Mark an entity as stale (needs fresh data)"""
-        key = f"{entity_type}:{entity_id}"
-        async with self._lock:
-            if key in self._entity_registry:
-                self._entity_registry[key].is_stale = True
+        key = (entity_type, entity_id)
+        state = self._entity_registry.get(key)
+        if state:
+            state.is_stale = True
     
     async def invalidate_all(self, entity_type: str = None) -> None:
         """Invalidate all entities or all of a specific type"""
-        async with self._lock:
-            for key, state in self._entity_registry.items():
-                if entity_type is None or state.entity_type == entity_type:
-                    state.is_stale = True
+        if entity_type is None:
+            self._generation += 1
+        else:
+            self._type_generation[entity_type] = self._type_generation.get(entity_type, 0) + 1
     
     def is_entity_stale(self, entity_type: str, entity_id: str) -> bool:
         """
         Check if entity is stale. 
         With stale_threshold=0, always returns True (always fetch live)
         """
-        if self.stale_threshold == 0:
+        if self.always_stale:
             return True  # Always fetch live data
         
-        key = f"{entity_type}:{entity_id}"
+        key = (entity_type, entity_id)
         state = self._entity_registry.get(key)
         
         if not state:
             return True
         
-        if state.is_stale:
+        if (
+            state.is_stale
+            or state.generation != self._generation
+            or state.type_generation != self._type_generation.get(entity_type, 0)
+        ):
             return True
         
-        last_update = datetime.fromisoformat(state.last_updated)
-        age = (datetime.utcnow() - last_update).total_seconds()
-        return age > self.stale_threshold
+        age = time.monotonic() - state.last_updated
+        return age > self._stale_threshold
     
-    async def get_all_connectors(self) -> Dict[str, Any]:
-        """Get all registered connectors"""
-        return self._connectors.copy()
+    @property
+    def connectors(self) -> Mapping[str, Any]:
+        """Read-only live view of registered connectors; use dict(...) for a snapshot"""
+        return MappingProxyType(self._connectors)
     
     async def health_check_all(self) -> Dict[str, bool]:
-        """Check health of all connectors"""
-        results = {}
-        for name, connector in self._connectors.items():
-            results[name] = await connector.health_check()
-        return results
+        """
+        Check health of all connectors concurrently.
+        Results are reused for health_cache_seconds to absorb probe storms.
+        """
+        now = time.monotonic()
+        if self._health_cache and now - self._health_cache[0] < self.health_cache_ttl:
+            return dict(self._health_cache[1])
+        
+        names = list(self._connectors)
+        results = await asyncio.gather(
+            *(self._connectors[name].health_check() for name in names),
+            return_exceptions=True
+        )
+        health = {name: result is True for name, result in zip(names, results)}
+        
+        self._health_cache = (now, health)
+        return dict(health)
@@ -0,0 +1,69 @@
+"""Tests for InventoryAgent's direct query routing"""
+import time
+
+import pytest
+
+from ai_agent_framework.agent import InventoryAgent
+from ai_agent_framework.sandbox import ExecutionSandbox
+from ai_agent_framework.state_engine import StateEngine
+
+
+@pytest.fixture
+def agent():
+    # Routing never touches the LLM
+    return InventoryAgent(None, StateEngine(), ExecutionSandbox())
+
+
+@pytest.mark.parametrize("query, product_id", [
+    ("Show product id P001", "P001"),
+    ("stock for product id: p002?", "p002"),
+    ("product ID #12345", "12345"),
+])
+def test_routes_product_id(agent, query, product_id):
+    assert agent._route_query(query) == {
+        "name": "get_product_inventory",
+        "arguments": {"product_id": product_id},
+    }
+
+
+@pytest.mark.parametrize("query, arguments", [
+    ("Which products are running low on stock?", {}),
+    ("Items low on stock below 3", {"threshold": 3}),
+    ("Show low-stock items under 5 units", {"threshold": 5}),
+    ("Which inventory items need a reorder?", {}),
+])
+def test_routes_low_stock(agent, query, arguments):
+    assert agent._route_query(query) == {
+        "name": "get_low_stock_items",
+        "arguments": arguments,
+    }
+
+
+@pytest.mark.parametrize("query", [
+    "What is the product id of the Laptop?",
+    "What's the product id for Mouse?",
+    "How do I reorder my saved reports?",
+    "I'm running low on ideas",
+    "How many laptops do we have in stock?",
+    "Hello",
+])
+def test_leaves_ambiguous_queries_to_llm(agent, query):
+    assert agent._route_query(query) is None
+
+
+def test_plural_product_ids_is_not_an_id_lookup(agent):
+    route = agent._route_query("List all product IDs that are low on stock")
+    assert route == {"name": "get_low_stock_items", "arguments": {}}
+
+
+@pytest.mark.parametrize("query", [
+    "reorder " * 8192,
+    "running low " * 5462,
+    "inventory " * 6554,
+    "product id" + " " * 65536,
+])
+def test_routing_is_linear_in_query_length(agent, query):
+    # 64 KB of repeated trigger words took seconds with a backtracking ".*" pattern
+    start = time.perf_counter()
+    agent._route_query(query)
+    assert time.perf_counter() - start < 0.5
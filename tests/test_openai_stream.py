@@ -0,0 +1,43 @@
+"""Tests for OpenAILLM's streamed tool-call parsing"""
+import asyncio
+
+import httpx
+import orjson
+
+from ai_agent_framework.llm import OpenAILLM
+
+
+def _sse(*chunks) -> bytes:
+    lines = [b"data: " + orjson.dumps(chunk) for chunk in chunks]
+    return b"\n\n".join(lines + [b"data: [DONE]"]) + b"\n\n"
+
+
+def test_stream_skips_chunks_without_choices():
+    body = _sse(
+        {"choices": [], "prompt_filter_results": []},
+        {"choices": [{"index": 0, "delta": {"tool_calls": [{
+            "index": 0, "id": "call_1", "type": "function",
+            "function": {"name": "get_low_stock_items", "arguments": '{"threshold": 5}'},
+        }]}}]},
+        {"choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls"}]},
+        {"choices": [], "usage": {"total_tokens": 42}},
+    )
+    llm = OpenAILLM(api_key="test")
+    llm._client = httpx.AsyncClient(
+        base_url=llm.base_url,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)),
+    )
+    calls = []
+    
+    async def run():
+        try:
+            return await llm._generate_stream({"model": llm.model, "messages": []}, calls.append)
+        finally:
+            await llm.aclose()
+    
+    response = asyncio.run(run())
+    
+    assert calls == [{"name": "get_low_stock_items", "arguments": {"threshold": 5}}]
+    choice = response["choices"][0]
+    assert choice["finish_reason"] == "tool_calls"
+    assert choice["message"]["tool_calls"][0]["id"] == "call_1"
@@ -0,0 +1,58 @@
+"""Tests for ExecutionSandbox SQL and expression validation"""
+import asyncio
+
+import pytest
+
+from ai_agent_framework.sandbox import ExecutionSandbox
+
+
+@pytest.fixture
+def sandbox():
+    return ExecutionSandbox(read_only=True)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT product_id, quantity FROM inventory WHERE product_id = $1",
+    "SELECT * FROM inventory WHERE product_id = ANY($1::text[])",
+    "  select\nlast_updated, created_at from inventory",
+])
+def test_accepts_read_only_selects(sandbox, query):
+    assert sandbox.validate_sql(query) == (True, None)
+
+
+@pytest.mark.parametrize("query", [
+    "DELETE FROM inventory",
+    "SELECT 1;DROP TABLE inventory",
+    "WITH d AS (DELETE FROM inventory RETURNING *) SELECT * FROM d",
+    "SELECT * FROM inventory FOR UPDATE",
+    "SELECT * FROM inventory FOR SHARE",
+    "SELECT * FROM inventory for no key update",
+    "SELECT * FROM inventory FOR KEY SHARE",
+    "SELECT * FROM inventory -- comment",
+    "SELECT CHAR(65)",
+])
+def test_rejects_unsafe_queries(sandbox, query):
+    is_valid, error = sandbox.validate_sql(query)
+    assert not is_valid
+    assert error
+
+
+def test_locking_allowed_when_not_read_only():
+    sandbox = ExecutionSandbox(read_only=False)
+    assert sandbox.validate_sql("SELECT * FROM inventory FOR UPDATE") == (True, None)
+
+
+@pytest.mark.parametrize("terms", [500, 1000])
+def test_deeply_nested_expression_evaluates(sandbox, terms):
+    # A left-deep BinOp chain; validation must not recurse once per level
+    result = asyncio.run(sandbox.execute_expression("+".join(["1"] * terms)))
+    assert result.success, result.error
+    assert result.result == terms
+
+
+@pytest.mark.parametrize("expression, error", [
+    ("__import__('os')", "Function '__import__' not allowed"),
+    ("().__class__.__bases__[0].__subclasses__()", "Complex function calls not allowed"),
+])
+def test_rejects_unsafe_expressions(sandbox, expression, error):
+    assert sandbox.validate_python_expression(expression) == (False, error)